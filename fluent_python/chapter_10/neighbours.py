@@ -0,0 +1,274 @@
+""" Nearest-neighbour indexes over collections of vectors.
+Any iterable of equally long sequences of numbers is accepted:
+Vector instances, a VectorBatch, tuples... The indexes keep the
+vectors in one contiguous array of doubles, shared with a VectorBatch
+of doubles rather than copied. Queries return (distance, position)
+pairs sorted by distance.
+
+>>> points = [(0, 0), (1, 0), (0, 2), (5, 5), (4, 4)]
+>>> tree = KDTree(points, leaf_size=2)
+>>> tree.knn((0.9, 0.1), 2)
+[(0.1414213562373095, 1), (0.9055385138137417, 0)]
+>>> tree.radius((4.5, 4.5), 1)
+[(0.7071067811865476, 3), (0.7071067811865476, 4)]
+>>> tree.knn((0.9, 0.1), 2) == brute_force_knn(points, (0.9, 0.1), 2)
+True
+>>> lsh = RandomProjectionLSH(points, width=4.0, seed=1)
+>>> lsh.knn((5, 5), 1)
+[(0.0, 3)]
+>>> type(nearest_neighbour_index(points)).__name__
+'KDTree'
+>>> tree.knn((0, 0), 0), RandomProjectionLSH([]).knn((0, 0), 1)
+([], [])
+>>> KDTree(points, leaf_size=0)
+Traceback (most recent call last):
+...
+ValueError: leaf_size must be at least 1, got 0
+"""
+import heapq
+import math
+import random
+from array import array
+from collections import defaultdict
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+LOW_DIMENSIONS = 16
+CHUNK_SIZE = 4096
+
+
+def distance(a, b):
+    return math.dist(a, b)
+
+
+class Points:
+    """ Equally long vectors stored row after row in one array('d').
+    The buffer of a VectorBatch of doubles, or of other Points,
+    is shared; with NumPy it is also viewed as a matrix. """
+
+    def __init__(self, vectors):
+        if isinstance(vectors, Points):
+            components, dim = vectors.components, vectors.dim
+        elif hasattr(vectors, '_matrix'):
+            components, dim = vectors._components, vectors.dim
+        else:
+            components, dim = array('d'), None
+            for vector in vectors:
+                row = array('d', vector)
+                if dim is None:
+                    dim = len(row)
+                elif len(row) != dim:
+                    raise ValueError(f'expected vectors of dimension {dim}, got {len(row)}')
+                components.extend(row)
+        if components.typecode != 'd':
+            components = array('d', components)
+        self.components = components
+        self.dim = dim or 0
+        self.matrix = None
+        if numpy is not None:
+            values = numpy.frombuffer(components, dtype=float)
+            self.matrix = values.reshape(len(self), self.dim)
+
+    def __len__(self):
+        return len(self.components) // self.dim if self.dim else 0
+
+    def __getitem__(self, position):
+        start = range(len(self))[position] * self.dim
+        return memoryview(self.components).toreadonly()[start:start + self.dim]
+
+    def __iter__(self):
+        return (self[position] for position in range(len(self)))
+
+    def coordinate(self, position, axis):
+        return self.components[position * self.dim + axis]
+
+    def distances(self, positions, query):
+        """ The distance from query of the vector at each position """
+        if not len(positions):
+            return []
+        if self.matrix is not None:
+            differences = self.matrix[positions] - numpy.asarray(query, dtype=float)
+            return numpy.sqrt(numpy.einsum('ij,ij->i', differences, differences)).tolist()
+        components, dim = self.components, self.dim
+        return [distance(components[i * dim:(i + 1) * dim], query) for i in positions]
+
+
+def brute_force_knn(points, query, k):
+    points = Points(points)
+    positions = range(len(points))
+    return heapq.nsmallest(k, zip(points.distances(positions, query), positions))
+
+
+def brute_force_radius(points, query, r):
+    points = Points(points)
+    positions = range(len(points))
+    return sorted((d, i) for d, i in zip(points.distances(positions, query), positions)
+                  if d <= r)
+
+
+class KDTree:
+    """ Exact k-d tree, for low dimensions. Nodes split at the median
+    of the axis with the widest spread; leaves keep up to leaf_size
+    positions, whose distances are computed in one NumPy call. """
+
+    def __init__(self, vectors, leaf_size=64):
+        if leaf_size < 1:
+            raise ValueError(f'leaf_size must be at least 1, got {leaf_size}')
+        self.points = Points(vectors)
+        self.leaf_size = leaf_size
+        self.root = self._build(list(range(len(self.points))))
+
+    def _widest_axis(self, positions):
+        points = self.points
+        if points.matrix is not None:
+            return int(numpy.ptp(points.matrix[positions], axis=0).argmax())
+        spreads = [(max(points.coordinate(i, axis) for i in positions)
+                    - min(points.coordinate(i, axis) for i in positions), axis)
+                   for axis in range(points.dim)]
+        return max(spreads)[1]
+
+    def _build(self, positions):
+        if len(positions) <= self.leaf_size:
+            return positions
+        axis = self._widest_axis(positions)
+        positions.sort(key=lambda i: self.points.coordinate(i, axis))
+        middle = len(positions) // 2
+        split = self.points.coordinate(positions[middle], axis)
+        return (axis, split, self._build(positions[:middle]), self._build(positions[middle:]))
+
+    def _search(self, query, visit, bound):
+        """ Depth-first walk calling visit on candidate leaves,
+        skipping subtrees farther than bound() from the query. """
+        stack = [(self.root, 0.0)]
+        while stack:
+            node, gap = stack.pop()
+            if gap > bound():
+                continue
+            if isinstance(node, list):
+                visit(node)
+                continue
+            axis, split, left, right = node
+            gap = query[axis] - split
+            near, far = (left, right) if gap < 0 else (right, left)
+            stack.append((far, abs(gap)))
+            stack.append((near, 0.0))
+
+    def knn(self, query, k):
+        if k <= 0:
+            return []
+        query = tuple(query)
+        best = []  # max-heap of (-distance, -position)
+
+        def visit(leaf):
+            for d, i in zip(self.points.distances(leaf, query), leaf):
+                item = (-d, -i)
+                if len(best) < k:
+                    heapq.heappush(best, item)
+                elif item > best[0]:
+                    heapq.heapreplace(best, item)
+
+        def bound():
+            return -best[0][0] if len(best) == k else math.inf
+
+        self._search(query, visit, bound)
+        return sorted((-d, -i) for d, i in best)
+
+    def radius(self, query, r):
+        query = tuple(query)
+        found = []
+
+        def visit(leaf):
+            found.extend((d, i) for d, i in zip(self.points.distances(leaf, query), leaf)
+                         if d <= r)
+
+        self._search(query, visit, lambda: r)
+        return sorted(found)
+
+
+class RandomProjectionLSH:
+    """ Approximate index for high dimensions. Each of the tables hashes
+    a vector by `hashes` random projections quantized into buckets of
+    the given width, so close vectors tend to share a bucket.
+    Candidates from the query's buckets are ranked by exact distance.
+    Without an explicit width, the mean distance between a sample of
+    pairs of vectors is used. """
+
+    def __init__(self, vectors, tables=8, hashes=4, width=None, seed=0):
+        self.points = Points(vectors)
+        dim = self.points.dim
+        rnd = random.Random(seed)
+        if width is None:
+            width = self.sample_distance(rnd) or 1.0
+        self.width = width
+        size = tables * hashes
+        self.tables = tables
+        self.hashes = hashes
+        self.directions = [[rnd.gauss(0, 1) for _ in range(dim)] for _ in range(size)]
+        self.offsets = [rnd.uniform(0, width) for _ in range(size)]
+        self.buckets = [defaultdict(list) for _ in range(tables)]
+        for position, keys in enumerate(self._keys(self.points)):
+            for bucket, key in zip(self.buckets, keys):
+                bucket[key].append(position)
+
+    def sample_distance(self, rnd, size=100):
+        if len(self.points) < 2:
+            return 0.0
+        pairs = [rnd.sample(range(len(self.points)), 2) for _ in range(size)]
+        return sum(distance(self.points[a], self.points[b]) for a, b in pairs) / size
+
+    def _cells(self, points):
+        """ The quantized projections of each of points, computed
+        CHUNK_SIZE vectors at a time under NumPy """
+        if numpy is not None:
+            directions = numpy.array(self.directions, dtype=float).T
+            offsets = numpy.array(self.offsets)
+            for start in range(0, len(points), CHUNK_SIZE):
+                projections = points.matrix[start:start + CHUNK_SIZE] @ directions
+                yield from numpy.floor((projections + offsets) / self.width).astype(int).tolist()
+            return
+        for vector in points:
+            yield [math.floor((sum(a * x for a, x in zip(direction, vector)) + b) / self.width)
+                   for direction, b in zip(self.directions, self.offsets)]
+
+    def _keys(self, points):
+        """ The bucket key in every table of each of points """
+        for cells in self._cells(points):
+            yield [tuple(cells[t * self.hashes:(t + 1) * self.hashes])
+                   for t in range(self.tables)]
+
+    def candidates(self, query):
+        found = set()
+        if not len(self.points):
+            return found
+        keys, = self._keys(Points([query]))
+        for bucket, key in zip(self.buckets, keys):
+            found.update(bucket.get(key, ()))
+        return found
+
+    def knn(self, query, k):
+        query = tuple(query)
+        candidates = list(self.candidates(query))
+        return heapq.nsmallest(k, zip(self.points.distances(candidates, query), candidates))
+
+    def radius(self, query, r):
+        query = tuple(query)
+        candidates = list(self.candidates(query))
+        return sorted((d, i) for d, i in zip(self.points.distances(candidates, query),
+                                             candidates) if d <= r)
+
+
+def nearest_neighbour_index(vectors, **options):
+    """ KDTree for up to LOW_DIMENSIONS dimensions,
+    RandomProjectionLSH above that. """
+    points = Points(vectors)
+    if points.dim > LOW_DIMENSIONS:
+        return RandomProjectionLSH(points, **options)
+    return KDTree(points, **options)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,161 @@
+""" Benchmarks for vector_v1.2
+
+    python vector_bench.py hash --dim 4096 --count 1000
+    python vector_bench.py knn --dim 3 --count 1000000
+    python vector_bench.py stream --dim 128 --count 100000
+    python vector_bench.py precision --dim 768 --count 10000
+    python vector_bench.py text --dim 16 --count 100000 --format .6f """
+import argparse
+import importlib.util
+import io
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+import neighbours
+
+_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'vector_v1.2.py')
+_spec = importlib.util.spec_from_file_location('vector_v1_2', _path)
+vector_v1_2 = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(vector_v1_2)
+Vector = vector_v1_2.Vector
+VectorBatch = vector_v1_2.VectorBatch
+VectorFile = vector_v1_2.VectorFile
+
+
+def timed(label, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    print(f'{label:<40}{time.perf_counter() - start:>10.4f} s')
+    return result
+
+
+def random_vectors(count, dim, seed=0):
+    rnd = random.Random(seed)
+    return [Vector(rnd.random() for _ in range(dim)) for _ in range(count)]
+
+
+def bench_hash(args):
+    vectors = random_vectors(args.count, args.dim)
+    copies = [Vector(v) for v in vectors]
+
+    def first_hashes():
+        return [hash(v) for v in copies]
+
+    def membership(repeat):
+        return sum(v in members for _ in range(repeat) for v in vectors)
+
+    timed('build set (hash computed once)', set, vectors)
+    members = set(vectors)
+    timed('hash of fresh copies (uncached)', first_hashes)
+    timed(f'{args.repeat} x membership (cached hash)', membership, args.repeat)
+    timed('norms (uncached)', lambda: [abs(v) for v in copies])
+    timed('norms (cached)', lambda: [abs(v) for v in copies])
+
+
+def bench_knn(args):
+    rnd = random.Random(0)
+    batch = timed(f'generate {args.count} x {args.dim}', VectorBatch,
+                  ([rnd.gauss(0, 1) for _ in range(args.dim)] for _ in range(args.count)))
+    queries = [[rnd.gauss(0, 1) for _ in range(args.dim)] for _ in range(args.queries)]
+    options = {}
+    if args.dim > neighbours.LOW_DIMENSIONS:
+        options = dict(tables=args.tables, hashes=args.hashes, width=args.width)
+    index = timed('build index', lambda: neighbours.nearest_neighbour_index(batch, **options))
+    print(f'index: {type(index).__name__}')
+    found = timed(f'{args.queries} queries, k={args.k}',
+                  lambda: [index.knn(q, args.k) for q in queries])
+    exact = timed(f'{args.queries} brute force queries',
+                  lambda: [neighbours.brute_force_knn(index.points, q, args.k)
+                           for q in queries])
+    hits = sum(len(set(a) & set(b)) for a, b in zip(found, exact))
+    print(f'recall: {hits / (args.k * args.queries):.3f}')
+
+
+def bench_stream(args):
+    vectors = random_vectors(args.count, args.dim)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'vectors.bin')
+        with open(path, 'wb') as fp:
+            timed('dump_vectors', vector_v1_2.dump_vectors, fp, vectors)
+        records = timed('bytes() per vector', lambda: [bytes(v) for v in vectors])
+        timed('frombytes per vector', lambda: [Vector.frombytes(r) for r in records])
+        with VectorFile(path) as stored:
+            timed('VectorFile iteration', lambda: sum(1 for _ in stored))
+            timed('VectorFile norms', lambda: sum(abs(v) for v in stored))
+
+
+def bench_precision(args):
+    rnd = random.Random(0)
+    rows = [[rnd.randint(-100, 100) for _ in range(args.dim)] for _ in range(args.count)]
+    for typecode in args.typecodes:
+        cls = vector_v1_2.vector_type(typecode)
+        print(f'{cls.__name__} ({typecode!r})')
+        tracemalloc.start()
+        vectors = timed('build', lambda: [cls(row) for row in rows])
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f'{"memory":<40}{size / 2 ** 20:>10.1f} MB')
+        timed('norms', lambda: [abs(cls(v)) for v in vectors])
+        timed('dot products', lambda: [v @ v for v in vectors])
+        timed('sums', lambda: [v + v for v in vectors])
+
+
+def bench_text(args):
+    vectors = random_vectors(args.count, args.dim)
+    copies = [Vector(v) for v in vectors]  # norms and angles not cached yet
+    spec = args.format
+
+    def per_object():
+        return ''.join(f'{v:{spec}}\n' for v in vectors)
+
+    def bulk():
+        text = io.StringIO()
+        vector_v1_2.dump_text(text, copies, spec)
+        return text.getvalue()
+
+    text = timed('format per vector', per_object)
+    timed('dump_text', bulk)
+    print(f'{"text size":<40}{len(text) / 2 ** 20:>10.1f} MB')
+    timed('load_text', lambda: list(vector_v1_2.load_text(io.StringIO(text))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    hash_parser = commands.add_parser('hash', help='cached hash and norm')
+    hash_parser.add_argument('--dim', type=int, default=4096)
+    hash_parser.add_argument('--count', type=int, default=1000)
+    hash_parser.add_argument('--repeat', type=int, default=10)
+    hash_parser.set_defaults(bench=bench_hash)
+    knn_parser = commands.add_parser('knn', help='nearest-neighbour index')
+    knn_parser.add_argument('--dim', type=int, default=3)
+    knn_parser.add_argument('--count', type=int, default=100_000)
+    knn_parser.add_argument('--queries', type=int, default=100)
+    knn_parser.add_argument('-k', type=int, default=10)
+    knn_parser.add_argument('--tables', type=int, default=8, help='LSH only')
+    knn_parser.add_argument('--hashes', type=int, default=4, help='LSH only')
+    knn_parser.add_argument('--width', type=float, help='LSH only')
+    knn_parser.set_defaults(bench=bench_knn)
+    stream_parser = commands.add_parser('stream', help='binary vector stream')
+    stream_parser.add_argument('--dim', type=int, default=128)
+    stream_parser.add_argument('--count', type=int, default=100_000)
+    stream_parser.set_defaults(bench=bench_stream)
+    precision_parser = commands.add_parser('precision', help='component typecodes')
+    precision_parser.add_argument('--dim', type=int, default=768)
+    precision_parser.add_argument('--count', type=int, default=10_000)
+    precision_parser.add_argument('--typecodes', nargs='+', default=['d', 'f', 'i', 'h'])
+    precision_parser.set_defaults(bench=bench_precision)
+    text_parser = commands.add_parser('text', help='bulk text formatting and parsing')
+    text_parser.add_argument('--dim', type=int, default=16)
+    text_parser.add_argument('--count', type=int, default=100_000)
+    text_parser.add_argument('--format', default='', help='format spec, e.g. .6f or h')
+    text_parser.set_defaults(bench=bench_text)
+    args = parser.parse_args()
+    args.bench(args)
+
+
+if __name__ == '__main__':
+    main()
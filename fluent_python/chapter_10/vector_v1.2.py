@@ -1,12 +1,19 @@
 import itertools
 import math
+import mmap
 import numbers
 import reprlib
 import operator
+import struct
 
 from array import array
 from functools import reduce
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 
 class Vector:
     """ Multidimensional vector
@@ -24,6 +31,18 @@ class Vector:
     (3.0, 5.0)
     >>> v2[1:4]
     Vector([1.0, 2.0, 3.0])
+    >>> v2[1:4][1:], v2[::3]
+    (Vector([2.0, 3.0]), Vector([0.0, 3.0, 6.0, 9.0]))
+    >>> Vector.frombytes(bytes(v2)) == v2
+    True
+    >>> octets = bytearray(bytes(v1))
+    >>> v3 = Vector.frombytes(octets)
+    >>> octets.clear()
+    >>> v3
+    Vector([3.0, 4.0, 5.0])
+    >>> import copy, pickle
+    >>> pickle.loads(pickle.dumps(v2[1:4])), copy.deepcopy(v2[::3])
+    (Vector([1.0, 2.0, 3.0]), Vector([0.0, 3.0, 6.0, 9.0]))
     >>> v2[1, 2]
     Traceback (most recent call last):
     ...
@@ -38,6 +57,10 @@ class Vector:
     Traceback (most recent call last):
     ...
     AttributeError: can't set attributes 'a' to 'z' in Vector
+    >>> v1.spam = 10
+    Traceback (most recent call last):
+    ...
+    AttributeError: 'Vector' object has no attribute 'spam'
     >>> hash(v1), hash(v2)
     (2, 1)
     >>> {v1, v2}
@@ -54,13 +77,30 @@ class Vector:
     '<(1.7320508075688772, 0.9553166181245093, 0.7853981633974483)>'
     >>> format(Vector([2, 2, 2]), '.3eh')
     '<(3.464e+00, 9.553e-01, 7.854e-01)>'
+    >>> v1 + Vector([1, 2, 3])
+    Vector([4.0, 6.0, 8.0])
+    >>> v1 + Vector([1, 2])
+    Vector([4.0, 6.0, 5.0])
+    >>> [1, 1, 1] + v1
+    Vector([4.0, 5.0, 6.0])
+    >>> v1 * 2, 0.5 * v1
+    (Vector([6.0, 8.0, 10.0]), Vector([1.5, 2.0, 2.5]))
+    >>> v1 @ Vector([1, 2, 3])
+    26.0
+    >>> v1 * 'x'
+    Traceback (most recent call last):
+    ...
+    TypeError: can't multiply sequence by non-int of type 'Vector'
     """
 
     typecode = 'd'
     shortcut_names = 'xyzt'
+    numpy_threshold = 256
+    __slots__ = ('_components', '_hash', '_norm', '_angles')
 
     def __init__(self, components):
         self._components = array(self.typecode, components)
+        self._hash = self._norm = self._angles = None
 
     def __getattr__(self, name):
         cls = type(self)
@@ -91,15 +131,15 @@ class Vector:
     def __getitem__(self, index):
         cls = type(self)
         if isinstance(index, slice):
-            return cls(self._components[index])
+            return cls._fromview(memoryview(self._components).toreadonly()[index])
         elif isinstance(index, numbers.Integral):
             return self._components[index]
         raise TypeError(f'{cls.__name__} indices must be integers')
 
     def __repr__(self):
-        components = reprlib.repr(self._components)
+        components = reprlib.repr(array(self.typecode, self._components[:6]))
         components = components[components.find('['):-1]
-        return 'Vector({})'.format(components)
+        return '{}({})'.format(type(self).__name__, components)
 
     def __str__(self):
         return str(tuple(self))
@@ -107,29 +147,127 @@ class Vector:
     def __bytes__(self):
         return bytes([ord(self.typecode)]) + bytes(self._components)
 
+    def _vectorized(self, *others):
+        """ True if the NumPy mode applies: NumPy is installed
+        and the operands are vectors long enough to pay for it. """
+        return (numpy is not None and len(self) >= self.numpy_threshold
+                and all(isinstance(other, Vector) and len(other) == len(self)
+                        for other in others))
+
+    def _ndarray(self):
+        """ The components as a NumPy array; integers are widened
+        to 64 bits so that arithmetic on them does not wrap around. """
+        values = numpy.asarray(memoryview(self._components))
+        return values.astype('q') if values.dtype.kind == 'i' else values
+
+    @classmethod
+    def _fromndarray(cls, values):
+        converted = values.astype(cls.typecode)
+        if converted.dtype.kind == 'i' and not numpy.array_equal(converted, values):
+            raise OverflowError(f'result out of range for typecode {cls.typecode!r}')
+        return cls(array(cls.typecode, converted.tobytes()))
+
+    def _result_type(self, other):
+        """ The class of the result of an operation with other;
+        operands other than vectors count as doubles. """
+        other_typecode = other.typecode if isinstance(other, Vector) else 'd'
+        return vector_type(promote(self.typecode, other_typecode))
+
     def __eq__(self, other):
         if len(self) != len(other):
             return False
+        if self._vectorized(other):
+            return bool(numpy.array_equal(self._ndarray(), other._ndarray()))
         return all(a == b for a, b in zip(self, other))
 
     def __hash__(self):
-        return reduce(operator.xor, map(hash, self._components))
+        if self._hash is None:
+            self._hash = reduce(operator.xor, map(hash, self._components))
+        return self._hash
 
     def __abs__(self):
-        return math.sqrt(sum(x * x for x in self))
+        if self._norm is None:
+            if self._vectorized():
+                values = self._ndarray().astype('d', copy=False)
+                self._norm = math.sqrt(numpy.dot(values, values))
+            else:
+                self._norm = math.sqrt(sum(x * x for x in self))
+        return self._norm
+
+    def __add__(self, other):
+        cls = self._result_type(other)
+        if self._vectorized(other):
+            return cls._fromndarray(self._ndarray() + other._ndarray())
+        try:
+            pairs = itertools.zip_longest(self, other, fillvalue=0)
+            return cls(a + b for a, b in pairs)
+        except TypeError:
+            return NotImplemented
+
+    def __radd__(self, other):
+        return self + other
+
+    def __mul__(self, scalar):
+        if not isinstance(scalar, numbers.Real):
+            return NotImplemented
+        cls = type(self)
+        if not isinstance(scalar, numbers.Integral) and self.typecode in INTEGER_TYPECODES:
+            cls = Vector
+        if self._vectorized():
+            return cls._fromndarray(self._ndarray() * scalar)
+        return cls(scalar * x for x in self)
+
+    def __rmul__(self, scalar):
+        return self * scalar
+
+    def _exact_dot(self, other):
+        """ True if the dot product with other may overflow 64-bit
+        integers, so it must be summed with Python ints instead. """
+        if self.typecode not in INTEGER_TYPECODES or other.typecode not in INTEGER_TYPECODES:
+            return False
+        largest = [max(map(abs, v._components), default=0) for v in (self, other)]
+        return largest[0] * largest[1] * len(self) >= 1 << 63
+
+    def __matmul__(self, other):
+        if self._vectorized(other) and not self._exact_dot(other):
+            return numpy.dot(self._ndarray(), other._ndarray()).item()
+        try:
+            if len(self) != len(other):
+                raise ValueError('@ requires vectors of equal length')
+            return sum(a * b for a, b in zip(self, other))
+        except TypeError:
+            return NotImplemented
+
+    def __rmatmul__(self, other):
+        return self @ other
 
     def __bool__(self):
         return bool(abs(self))
 
     def angle(self, n):
-        r = math.sqrt(sum(x * x for x in self[n:]))
+        r = abs(self[n:])
         a = math.atan2(r, self[n-1])
         if (n == len(self) - 1) and (self[-1] < 0):
             return math.pi * 2 - a
         return a
 
+    def _suffix_norms(self):
+        """ Norms of the components from the n-th on, for every n,
+        from the sums of squares accumulated in one reverse pass. """
+        if self._vectorized():
+            values = self._ndarray().astype('d', copy=False)
+            return numpy.sqrt(numpy.cumsum((values * values)[::-1])[::-1]).tolist()
+        sums = list(itertools.accumulate(x * x for x in reversed(self._components)))
+        sums.reverse()
+        return [math.sqrt(s) for s in sums]
+
     def angles(self):
-        return (self.angle(n) for n in range(1, len(self)))
+        if self._angles is None:
+            angles = [math.atan2(r, x) for r, x in zip(self._suffix_norms()[1:], self)]
+            if angles and self[-1] < 0:
+                angles[-1] = math.pi * 2 - angles[-1]
+            self._angles = tuple(angles)
+        return iter(self._angles)
 
     def __format__(self, format_spec=''):
         if format_spec.endswith('h'):
@@ -142,11 +280,446 @@ class Vector:
         components = (format(c, format_spec) for c in coords)
         return outer_format.format(', '.join(components))
 
+    def __reduce__(self):
+        return type(self), (array(self.typecode, self._components),)
+
     @classmethod
     def frombytes(cls, octets):
-        typecode = chr(octets[0])
-        memv = memoryview(octets[1:]).cast(typecode)
-        return cls(memv)
+        """ The vector of the class matching the typecode byte.
+        It shares read-only buffers, such as bytes, and copies
+        writable ones, which could change under it. """
+        memv = memoryview(octets)
+        typecode = chr(memv[0])
+        if typecode != cls.typecode:
+            cls = vector_type(typecode)
+        if memv.readonly:
+            return cls._fromview(memv[1:].cast(typecode))
+        components = array(typecode)
+        components.frombytes(memv[1:])
+        return cls._fromview(components)
+
+    @classmethod
+    def _fromview(cls, components):
+        """ Vector over components, an array or a memoryview, without a copy. """
+        vector = cls.__new__(cls)
+        vector._components = components
+        vector._hash = vector._norm = vector._angles = None
+        return vector
+
+
+class FloatVector(Vector):
+    """ Vector of single precision components, half the size of Vector
+    >>> v = FloatVector([0.5, 1.5])
+    >>> v, v * 2, v * 0.5
+    (FloatVector([0.5, 1.5]), FloatVector([1.0, 3.0]), FloatVector([0.25, 0.75]))
+    >>> v + Vector([1, 1])
+    Vector([1.5, 2.5])
+    >>> v + IntVector([1, 1])
+    Vector([1.5, 2.5])
+    >>> v + ShortVector([1, 1])
+    FloatVector([1.5, 2.5])
+    >>> Vector.frombytes(bytes(v))
+    FloatVector([0.5, 1.5])
+    """
+
+    typecode = 'f'
+    __slots__ = ()
+
+
+class IntVector(Vector):
+    """ Vector of signed 32-bit integer components
+    >>> v = IntVector([3, 4])
+    >>> v, abs(v), v @ v
+    (IntVector([3, 4]), 5.0, 25)
+    >>> v * 2, v * 0.5
+    (IntVector([6, 8]), Vector([1.5, 2.0]))
+    >>> v + ShortVector([1, 1]), v + [1, 1]
+    (IntVector([4, 5]), Vector([4.0, 5.0]))
+    >>> big = IntVector([2**31 - 1] * 256)
+    >>> big @ big == 256 * (2**31 - 1) ** 2, abs(big) == 16 * (2**31 - 1)
+    (True, True)
+    >>> ShortVector([30000]) + ShortVector([30000])
+    Traceback (most recent call last):
+    ...
+    OverflowError: signed short integer is greater than maximum
+    """
+
+    typecode = 'i'
+    __slots__ = ()
+
+
+class ShortVector(Vector):
+    """ Vector of signed 16-bit integer components """
+
+    typecode = 'h'
+    __slots__ = ()
+
+
+VECTOR_TYPES = {cls.typecode: cls for cls in (Vector, FloatVector, IntVector, ShortVector)}
+PROMOTION_ORDER = 'hifd'
+INTEGER_TYPECODES = 'hi'
+
+
+def vector_type(typecode):
+    try:
+        return VECTOR_TYPES[typecode]
+    except KeyError:
+        raise ValueError(f'unsupported typecode {typecode!r}') from None
+
+
+def promote(*typecodes):
+    """ Typecode of the result of an operation between vectors of the
+    given typecodes, the widest by h < i < f < d. Single precision cannot
+    hold every 32-bit integer, so mixing i and f gives d. """
+    typecode = max(typecodes, key=PROMOTION_ORDER.index)
+    if typecode == 'f' and 'i' in typecodes:
+        return 'd'
+    return typecode
+
+
+class VectorBatch:
+    """ Many vectors of the same dimension in one contiguous array
+    >>> batch = VectorBatch([[3, 4], [1, 1], [0, 0]])
+    >>> batch
+    <VectorBatch of 3 vectors, dim=2>
+    >>> len(batch), batch.dim
+    (3, 2)
+    >>> batch[0], batch[-1]
+    (Vector([3.0, 4.0]), Vector([0.0, 0.0]))
+    >>> batch[0] == Vector([3, 4])
+    True
+    >>> batch[1:]
+    <VectorBatch of 2 vectors, dim=2>
+    >>> list(batch)
+    [Vector([3.0, 4.0]), Vector([1.0, 1.0]), Vector([0.0, 0.0])]
+    >>> list(batch.norms())
+    [5.0, 1.4142135623730951, 0.0]
+    >>> list(batch.angles(1))
+    [0.9272952180016122, 0.7853981633974483, 0.0]
+    >>> batch.hashes() == [hash(v) for v in batch]
+    True
+    >>> batch.equals(Vector([1, 1]))
+    [False, True, False]
+    >>> VectorBatch.frombytes(bytes(batch)) == batch
+    True
+    >>> VectorBatch([[1, 2], [3]])
+    Traceback (most recent call last):
+    ...
+    ValueError: expected vectors of dimension 2, got 1
+    >>> shorts = VectorBatch([[3, 4], [1, 1]], typecode='h')
+    >>> shorts[0], list(shorts.norms())
+    (ShortVector([3, 4]), [5.0, 1.4142135623730951])
+    >>> VectorBatch.frombytes(bytes(shorts)).typecode
+    'h'
+    """
+
+    header = struct.Struct('=cI')
+
+    def __init__(self, vectors, dim=None, typecode='d'):
+        self.typecode = typecode
+        self._vector_type = vector_type(typecode)
+        self._components = array(typecode)
+        for vector in vectors:
+            row = array(self.typecode, vector)
+            if dim is None:
+                dim = len(row)
+            elif len(row) != dim:
+                raise ValueError(f'expected vectors of dimension {dim}, got {len(row)}')
+            self._components.extend(row)
+        self._dim = dim or 0
+
+    @classmethod
+    def _fromarray(cls, components, dim):
+        batch = cls((), dim, components.typecode)
+        batch._components = components
+        return batch
+
+    @property
+    def dim(self):
+        return self._dim
+
+    def __len__(self):
+        return len(self._components) // self._dim if self._dim else 0
+
+    def _rows(self):
+        view = memoryview(self._components).toreadonly()
+        return (view[start:start + self._dim]
+                for start in range(0, len(view), self._dim or 1))
+
+    def _matrix(self):
+        values = numpy.frombuffer(self._components, dtype=self.typecode)
+        return values.reshape(len(self), self._dim)
+
+    def __iter__(self):
+        return (self._vector_type._fromview(row) for row in self._rows())
+
+    def __getitem__(self, index):
+        cls = type(self)
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step == 1:
+                components = self._components[start * self._dim:stop * self._dim]
+                return cls._fromarray(components, self._dim)
+            return cls((self[i] for i in range(start, stop, step)), self._dim, self.typecode)
+        elif isinstance(index, numbers.Integral):
+            start = range(len(self))[index] * self._dim
+            view = memoryview(self._components).toreadonly()
+            return self._vector_type._fromview(view[start:start + self._dim])
+        raise TypeError(f'{cls.__name__} indices must be integers')
+
+    def __repr__(self):
+        return f'<{type(self).__name__} of {len(self)} vectors, dim={self._dim}>'
+
+    def __eq__(self, other):
+        if not isinstance(other, VectorBatch):
+            return NotImplemented
+        return self._dim == other._dim and self._components == other._components
+
+    def __bytes__(self):
+        header = self.header.pack(self.typecode.encode(), self._dim)
+        return header + bytes(self._components)
+
+    @classmethod
+    def frombytes(cls, octets):
+        typecode, dim = cls.header.unpack_from(octets)
+        components = array(vector_type(typecode.decode()).typecode)
+        components.frombytes(memoryview(octets)[cls.header.size:])
+        return cls._fromarray(components, dim)
+
+    def norms(self):
+        if numpy is not None:
+            matrix = self._matrix().astype('d', copy=False)
+            return array('d', numpy.sqrt((matrix * matrix).sum(axis=1)).tobytes())
+        return array('d', (math.hypot(*row) for row in self._rows()))
+
+    def angles(self, n):
+        """ The n-th hyperspherical angle of every vector """
+        if numpy is not None and len(self):
+            matrix = self._matrix()
+            norms = numpy.frombuffer(self.norms_from(n), dtype='d')
+            angles = numpy.arctan2(norms, matrix[:, n - 1].astype('d'))
+            if n == self._dim - 1:
+                angles = numpy.where(matrix[:, -1] < 0, math.pi * 2 - angles, angles)
+            return array('d', angles.tobytes())
+        result = array('d')
+        for row, r in zip(self._rows(), self.norms_from(n)):
+            a = math.atan2(r, row[n - 1])
+            if (n == self._dim - 1) and (row[-1] < 0):
+                a = math.pi * 2 - a
+            result.append(a)
+        return result
+
+    def norms_from(self, n):
+        """ Norms of the components from the n-th on """
+        if numpy is not None:
+            tail = self._matrix()[:, n:].astype('d')
+            return array('d', numpy.sqrt((tail * tail).sum(axis=1)).tobytes())
+        return array('d', (math.hypot(*row[n:]) for row in self._rows()))
+
+    def hashes(self):
+        if numpy is not None and self._dim:
+            component_hashes = numpy.fromiter(map(hash, self._components), dtype='q',
+                                              count=len(self._components))
+            return numpy.bitwise_xor.reduce(component_hashes.reshape(len(self), self._dim),
+                                            axis=1).tolist()
+        return [reduce(operator.xor, map(hash, row), 0) for row in self._rows()]
+
+    def equals(self, vector):
+        """ Whether each vector of the batch equals vector """
+        if len(vector) != self._dim:
+            return [False] * len(self)
+        if numpy is not None:
+            target = numpy.frombuffer(array('d', vector), dtype='d')
+            return (self._matrix() == target).all(axis=1).tolist()
+        target = memoryview(array('d', vector))
+        return [row == target for row in self._rows()]
+
+
+STREAM_MAGIC = b'VECS'
+STREAM_HEADER = struct.Struct('=4sc3xQ')
+STREAM_BUFFER = 1 << 16
+
+
+def dump_vectors(fp, vectors, typecode='d'):
+    """ Writes vectors of the same dimension to the binary file fp:
+    a header with the typecode and the dimension, then the packed rows.
+    Returns the number of vectors written. """
+    vectors = iter(vectors)
+    first = next(vectors, None)
+    dim = 0 if first is None else len(first)
+    fp.write(STREAM_HEADER.pack(STREAM_MAGIC, typecode.encode(), dim))
+    if first is None:
+        return 0
+    count = 0
+    buffer = array(typecode)
+    for vector in itertools.chain([first], vectors):
+        if len(vector) != dim:
+            raise ValueError(f'expected vectors of dimension {dim}, got {len(vector)}')
+        buffer.extend(vector)
+        count += 1
+        if len(buffer) >= STREAM_BUFFER:
+            fp.write(buffer)
+            del buffer[:]
+    fp.write(buffer)
+    return count
+
+
+class VectorFile:
+    """ Read-only, memory-mapped sequence of the vectors stored by
+    dump_vectors. Vectors are views into the mapping, made only when
+    accessed; vectors still referenced at close keep the mapping open
+    until they are garbage collected.
+    >>> import os, tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), 'vectors.bin')
+    >>> with open(path, 'wb') as fp:
+    ...     dump_vectors(fp, [Vector([3, 4]), Vector([1, 1]), (0, 0)])
+    3
+    >>> with VectorFile(path) as vectors:
+    ...     len(vectors), vectors.dim, vectors.typecode
+    ...     abs(vectors[0]), sum(1 for v in vectors if v)
+    (3, 2, 'd')
+    (5.0, 2)
+    >>> with VectorFile(path) as vectors:
+    ...     first = vectors[0]
+    >>> first
+    Vector([3.0, 4.0])
+    >>> with open(path, 'wb') as fp:
+    ...     dump_vectors(fp, [[1, 2]], typecode='l')
+    1
+    >>> VectorFile(path)
+    Traceback (most recent call last):
+    ...
+    ValueError: unsupported typecode 'l'
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as fp:
+            self._map = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, typecode, dim = STREAM_HEADER.unpack_from(self._map)
+        except struct.error:
+            magic = None
+        try:
+            if magic != STREAM_MAGIC:
+                raise ValueError(f'{path!r} is not a vector stream')
+            self._vector_type = vector_type(chr(typecode[0]))
+        except ValueError:
+            self._map.close()
+            raise
+        self.typecode = self._vector_type.typecode
+        self.dim = dim
+        row_size = dim * array(self.typecode).itemsize
+        rows = (len(self._map) - STREAM_HEADER.size) // row_size if row_size else 0
+        payload = memoryview(self._map)[STREAM_HEADER.size:STREAM_HEADER.size + rows * row_size]
+        self._components = payload.cast(self.typecode)
+        payload.release()
+
+    def __len__(self):
+        return len(self._components) // self.dim if self.dim else 0
+
+    def __getitem__(self, index):
+        if not isinstance(index, numbers.Integral):
+            raise TypeError(f'{type(self).__name__} indices must be integers')
+        start = range(len(self))[index] * self.dim
+        return self._vector_type._fromview(self._components[start:start + self.dim])
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def close(self):
+        self._components.release()
+        try:
+            self._map.close()
+        except BufferError:
+            pass  # vectors still export the mapping, which closes with the last of them
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+TEXT_BATCH_SIZE = 1024
+
+
+def dump_text(fp, vectors, format_spec='', batch_size=TEXT_BATCH_SIZE):
+    """ Writes one line per vector to the text file fp, as format(vector,
+    format_spec) would, formatting each vector with a single call on
+    a template cached per dimension and writing lines in batches.
+    Returns the number of vectors written. """
+    polar = format_spec.endswith('h')
+    if polar:
+        format_spec = format_spec[:-1]
+    outer_format = '<({})>\n' if polar else '({})\n'
+    field = '{:' + format_spec + '}'
+    templates = {}
+    lines = []
+    count = 0
+    for vector in vectors:
+        coords = itertools.chain([abs(vector)], vector.angles()) if polar else vector
+        try:
+            template = templates[len(vector)]
+        except KeyError:
+            template = templates[len(vector)] = outer_format.format(', '.join(
+                [field] * (len(vector) if len(vector) or not polar else 1)))
+        lines.append(template.format(*coords))
+        count += 1
+        if len(lines) >= batch_size:
+            fp.write(''.join(lines))
+            lines.clear()
+    fp.write(''.join(lines))
+    return count
+
+
+def _cartesian(coords):
+    """ Components of the vector with the hyperspherical
+    coordinates (r, angle_1, ..., angle_n-1) """
+    r, *angles = coords
+    components = []
+    for angle in angles:
+        components.append(r * math.cos(angle))
+        r *= math.sin(angle)
+    components.append(r)
+    return components
+
+
+def load_text(fp, cls=Vector):
+    """ Yields the vectors written one per line in the (a, b, c)
+    or <(r, angle, ...)> forms, as instances of cls. Blank lines
+    are skipped. Components of integer classes are parsed as int,
+    and converted hyperspherical coordinates are rounded for them.
+    >>> import io
+    >>> text = io.StringIO()
+    >>> dump_text(text, [Vector([3, 4]), Vector([1, -1, 1])], 'h')
+    2
+    >>> dump_text(text, [IntVector([3, 4])])
+    1
+    >>> print(text.getvalue(), end='')
+    <(5.0, 0.9272952180016122)>
+    <(1.7320508075688772, 0.9553166181245093, 2.356194490192345)>
+    (3, 4)
+    >>> [[round(x, 12) for x in v] for v in load_text(io.StringIO(text.getvalue()))]
+    [[3.0, 4.0], [1.0, -1.0, 1.0], [3.0, 4.0]]
+    >>> list(load_text(io.StringIO(text.getvalue()), IntVector))
+    [IntVector([3, 4]), IntVector([1, -1, 1]), IntVector([3, 4])]
+    """
+    integral = cls.typecode in INTEGER_TYPECODES
+    number = int if integral else float
+    for line in fp:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('<(') and line.endswith(')>'):
+            components = _cartesian(map(float, line[2:-2].split(',')))
+            if integral:
+                components = map(round, components)
+            yield cls(components)
+        elif line.startswith('(') and line.endswith(')'):
+            body = line[1:-1]
+            yield cls(map(number, body.split(',')) if body.strip() else ())
+        else:
+            raise ValueError(f'not a vector: {line!r}')
 
 
 if __name__ == '__main__':
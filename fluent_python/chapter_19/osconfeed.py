@@ -1,14 +1,112 @@
 import os
 import json
+import pickle
+import shutil
 import warnings
 
-from urllib.request import urlopen
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
 
 URL = 'http://www.oreilly.com/pub/sc/osconfeed'
 JSON = 'data/osconfeed.json'
+CHUNK_SIZE = 1 << 16
+NUMBER_ENDS = frozenset(',]} \t\r\n')
 
+_loaded = {}  # path -> (stamp, feed)
 
-def load():
+
+def _stamp(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _snapshot_path(path):
+    return os.path.splitext(path)[0] + '.pickle'
+
+
+def _validators_path(path):
+    return path + '.http'
+
+
+def _read_snapshot(path, stamp):
+    """ The feed pickled for the given stamp of path, if any """
+    try:
+        with open(_snapshot_path(path), 'rb') as fp:
+            if pickle.load(fp) != stamp:
+                return None
+            return pickle.load(fp)
+    except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+        return None
+
+
+def _write_snapshot(path, stamp, feed):
+    """ Pickles the feed next to path if possible; the snapshot only
+    saves time, so failing to write it is not an error """
+    snapshot = _snapshot_path(path)
+    try:
+        with open(snapshot + '.tmp', 'wb') as fp:
+            pickle.dump(stamp, fp, pickle.HIGHEST_PROTOCOL)
+            pickle.dump(feed, fp, pickle.HIGHEST_PROTOCOL)
+        os.replace(snapshot + '.tmp', snapshot)
+    except OSError:
+        try:
+            os.remove(snapshot + '.tmp')
+        except OSError:
+            pass
+
+
+def download(url=None, path=None):
+    """ Saves url (by default URL) to path (by default JSON), unless
+    the ETag or Last-Modified validators kept from the previous
+    download show that nothing changed. Returns True if path
+    was (re)written. """
+    url = url or URL
+    path = path or JSON
+    try:
+        with open(_validators_path(path)) as fp:
+            validators = json.load(fp)
+    except (OSError, ValueError):
+        validators = {}
+    headers = {}
+    if os.path.exists(path) and validators.get('url') == url:
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+    try:
+        with urlopen(Request(url, headers=headers)) as remote:
+            with open(path + '.tmp', 'wb') as local:
+                shutil.copyfileobj(remote, local, CHUNK_SIZE)
+            validators = {'url': url,
+                          'etag': remote.headers.get('ETag'),
+                          'last_modified': remote.headers.get('Last-Modified')}
+    except HTTPError as error:
+        if error.code == 304:
+            return False
+        raise
+    os.replace(path + '.tmp', path)
+    with open(_validators_path(path), 'w') as fp:
+        json.dump(validators, fp)
+    return True
+
+
+def _fetch(url, path, refresh):
+    """ The path of the local copy of the feed,
+    downloaded if missing or, with refresh, outdated """
+    url = url or URL
+    path = path or JSON
+    dirname = os.path.dirname(path)
+    if dirname and not os.path.isdir(dirname):
+        os.makedirs(dirname)
+    if not os.path.exists(path):
+        warnings.warn(f'downloading {url} to {path}')
+        download(url, path)
+    elif refresh:
+        download(url, path)
+    return path
+
+
+def load(url=None, path=None, refresh=False):
     """
     >>> feed = load()
     >>> sorted(feed['Schedule'].keys())
@@ -27,17 +125,133 @@ def load():
     'There *Will* Be Bugs'
     >>> feed['Schedule']['events'][40]['speakers']
     [3471, 5199]
+    >>> load() is feed
+    True
+
+    The parsed feed is kept in memory and pickled next to path; both
+    copies are discarded when the modification time or size of path
+    change. Callers share the feed, so they must not modify it.
+    With refresh, url is checked for a newer feed first. url and path
+    default to the module's URL and JSON, read at every call.
+    """
+    path = _fetch(url, path, refresh)
+    stamp = _stamp(path)
+    cached = _loaded.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    feed = _read_snapshot(path, stamp)
+    if feed is None:
+        with open(path) as fp:
+            feed = json.load(fp)
+        _write_snapshot(path, stamp, feed)
+    _loaded[path] = stamp, feed
+    return feed
+
+
+class _JSONStream:
+    """ Text read from fp in chunks, with just enough buffered
+    to decode the next JSON value with JSONDecoder.raw_decode
+    >>> from io import StringIO
+    >>> list(_JSONStream(StringIO('[0.25, 1e+20, 3]'), 2).items())
+    [0.25, 1e+20, 3]
+    """
+
+    def __init__(self, fp, chunk_size):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        data = self.fp.read(self.chunk_size)
+        if not data:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """ The next non-whitespace character, or '' at the end """
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self._fill():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def expect(self, chars):
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f'expected one of {chars!r}, got {char!r} in JSON stream')
+        self.pos += 1
+        return char
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # a number may go on in the next chunk unless a delimiter follows it
+            if (isinstance(value, (int, float)) and self.buffer[end:end + 1] not in NUMBER_ENDS
+                    and self._fill()):
+                continue
+            self.pos = end
+            return value
+
+    def members(self):
+        """ Yields the keys of the object starting at the current position,
+        leaving the stream at the value of each key """
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(':')
+            yield key
+            if self.expect(',}') == '}':
+                return
+
+    def items(self):
+        """ Yields the items of the array at the current position """
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.expect(',]') == ']':
+                return
+
+
+def iter_records(url=None, path=None, refresh=False, chunk_size=CHUNK_SIZE):
+    """ Yields (collection, record) pairs for every record of the
+    collections under 'Schedule', decoding one record at a time, so
+    memory does not grow with the size of the feed.
+    >>> from collections import Counter
+    >>> counts = Counter(collection for collection, _ in iter_records())
+    >>> sorted(counts.items())
+    [('conferences', 1), ('events', 494), ('speakers', 357), ('venues', 53)]
     """
-    dirname = os.path.dirname(JSON)
-    if not os.path.isdir(dirname):
-        os.mkdir(dirname)
-    if not os.path.exists(JSON):
-        warnings.warn(f'downloading {URL} to {JSON}')
-        with urlopen(URL) as remote, open(JSON, 'wb') as local:
-            local.write(remote.read())
-
-    with open(JSON) as fp:
-        return json.load(fp)
+    path = _fetch(url, path, refresh)
+    with open(path) as fp:
+        stream = _JSONStream(fp, chunk_size)
+        for key in stream.members():
+            if key != 'Schedule':
+                stream.value()
+                continue
+            for collection in stream.members():
+                if stream.peek() != '[':
+                    stream.value()
+                    continue
+                for record in stream.items():
+                    yield collection, record
 
 
 if __name__ == '__main__':
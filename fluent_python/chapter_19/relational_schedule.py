@@ -26,6 +26,7 @@ import osconfeed
 
 DB_NAME = 'data/schedule2_db'
 CONFERENCE = 'conference.115'
+BATCH_SIZE = 1000
 
 
 class Record:
@@ -91,22 +92,28 @@ class Event(DbRecord):
         return super().__repr__()
 
 
+def record_factory(record_type):
+    cls_name = record_type.capitalize()
+    cls = globals().get(cls_name, DbRecord)
+    if inspect.isclass(cls) and issubclass(cls, DbRecord):
+        return cls
+    return DbRecord
+
+
 def load_db(db):
-    raw_data = osconfeed.load()
     warnings.warn('loading ' + DB_NAME)
-    for collection, records in raw_data['Schedule'].items():
+    batch = {}
+    for collection, record in osconfeed.iter_records():
         record_type = collection[:-1]
-        cls_name = record_type.capitalize()
-        cls = globals().get(cls_name, DbRecord)
-        if inspect.isclass(cls) and issubclass(cls, DbRecord):
-            factory = cls
-        else:
-            factory = DbRecord
-        for record in records:
-            key = f"{record_type}.{record['serial']}"
-            record['serial'] = key
-            print(record)
-            db[key] = factory(**record)
+        factory = record_factory(record_type)
+        key = f"{record_type}.{record['serial']}"
+        record['serial'] = key
+        print(record)
+        batch[key] = factory(**record)
+        if len(batch) >= BATCH_SIZE:
+            db.update(batch)
+            batch.clear()
+    db.update(batch)
 
 
 if __name__ == '__main__':
@@ -5,6 +5,7 @@ import shelve
 
 DB_NAME = 'data/schedule_db'
 CONFERENCE = 'conference.115'
+BATCH_SIZE = 1000
 
 
 class Record:
@@ -25,14 +26,17 @@ def load_db(db):
     ('Anna Ravenscroft', 'annaraven')
     >>> db.close()
     """
-    raw_data = osconfeed.load()
     warnings.warn('loading ' + DB_NAME)
-    for collection, records in raw_data['Schedule'].items():
+    batch = {}
+    for collection, record in osconfeed.iter_records():
         record_type = collection[:-1]
-        for record in records:
-            key = '{}.{}'.format(record_type, record['serial'])
-            record['serial'] = key
-            db[key] = Record(**record)
+        key = '{}.{}'.format(record_type, record['serial'])
+        record['serial'] = key
+        batch[key] = Record(**record)
+        if len(batch) >= BATCH_SIZE:
+            db.update(batch)
+            batch.clear()
+    db.update(batch)
 
 
 if __name__ == '__main__':
@@ -57,10 +57,12 @@ class Vector:
     """
 
     typecode = 'd'
+    __slots__ = ('__x', '__y', '_hash', '_norm', '_angle')
 
     def __init__(self, x, y):
         self.__x = float(x)
         self.__y = float(y)
+        self._hash = self._norm = self._angle = None
 
     def __repr__(self):
         return f'{type(self).__name__}({self.x!r}, {self.y!r})'
@@ -69,7 +71,9 @@ class Vector:
         return str(tuple(self))
 
     def __abs__(self):
-        return hypot(self.x, self.y)
+        if self._norm is None:
+            self._norm = hypot(self.x, self.y)
+        return self._norm
 
     def __bool__(self):
         return bool(abs(self))
@@ -95,7 +99,9 @@ class Vector:
         return outer_format.format(*components)
 
     def __hash__(self):
-        return hash(self.x) ^ hash(self.y)
+        if self._hash is None:
+            self._hash = hash(self.x) ^ hash(self.y)
+        return self._hash
 
     def __int__(self):
         return int(abs(self))
@@ -115,7 +121,9 @@ class Vector:
         return self.__y
 
     def angle(self):
-        return atan2(self.y, self.x)
+        if self._angle is None:
+            self._angle = atan2(self.y, self.x)
+        return self._angle
 
     @classmethod
     def frombytes(cls, octets):
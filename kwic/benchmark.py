@@ -0,0 +1,154 @@
+""" Benchmark of both KWIC decompositions. Generates a synthetic corpus
+and runs every stage of each MasterControl separately, reporting
+wall time, how much the stage raised the peak resident set size of
+the process and, optionally, the memory allocated by the stage as
+traced by tracemalloc. Each decomposition runs in a fresh process,
+so only its own earlier stages count: a stage that stays below the
+peak they reached reports no growth.
+
+    python benchmark.py --lines 10000 100000 --words 3 12 --allocations """
+import argparse
+import io
+import multiprocessing
+import os
+import random
+import resource
+import string
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from typing import Callable, Iterator, List, Tuple
+
+import data_hiding
+import flowchart
+
+VOCABULARY_SIZE = 20_000
+
+
+def make_corpus(lines: int, min_words: int, max_words: int, seed: int = 0) -> str:
+    rnd = random.Random(seed)
+    vocabulary = [''.join(rnd.choices(string.ascii_letters, k=rnd.randint(1, 10)))
+                  for _ in range(VOCABULARY_SIZE)]
+    vocabulary[:len(flowchart.STOP_WORDS)] = sorted(flowchart.STOP_WORDS)
+    return '\n'.join(' '.join(rnd.choices(vocabulary, k=rnd.randint(min_words, max_words)))
+                     for _ in range(lines)) + '\n'
+
+
+Row = Tuple[str, str, float, int, int]
+
+
+class Report:
+
+    def __init__(self, allocations: bool) -> None:
+        self.allocations = allocations
+        self.rows: List[Row] = []
+
+    @contextmanager
+    def stage(self, decomposition: str, name: str) -> Iterator[None]:
+        if self.allocations:
+            tracemalloc.start()
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        yield
+        elapsed = time.perf_counter() - start
+        allocated = 0
+        if self.allocations:
+            _, allocated = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - peak
+        self.rows.append((decomposition, name, elapsed, rss, allocated))
+
+    def print(self, title: str) -> None:
+        print(title)
+        print(f'{"decomposition":<14}{"stage":<14}{"time, s":>10}'
+              f'{"RSS growth, MB":>16}{"allocated, MB":>15}')
+        for decomposition, name, elapsed, rss, allocated in self.rows:
+            allocated_mb = f'{allocated / 2 ** 20:.1f}' if self.allocations else '-'
+            print(f'{decomposition:<14}{name:<14}{elapsed:>10.3f}'
+                  f'{rss / 2 ** 10:>16.1f}{allocated_mb:>15}')
+        print()
+
+
+def bench_flowchart(report: Report, corpus: str, compact: bool,
+                    stop_words: frozenset, scan: bool) -> None:
+    stage = partial(report.stage, 'flowchart')
+    with stage('input'):
+        reader = flowchart.Input(compact)
+        reader.read_lines(io.StringIO(corpus))
+    if scan:
+        with stage('shift (scan)'):
+            flowchart.CircularShift(compact).make_shifts_by_scan(reader.chars, reader.index)
+    with stage('shift'):
+        shifter = flowchart.CircularShift(compact)
+        shifter.make_shifts(reader.chars, reader.index)
+    with stage('filter'):
+        keywords = flowchart.KeywordFilter(stop_words)
+        shifts = keywords.filter(reader.chars, reader.index, shifter.shifts)
+    with stage('sort'):
+        shifts = flowchart.Alphabetizing(reader.chars, reader.index).sort(shifts)
+    with open(os.devnull, 'w') as devnull, stage('output'):
+        flowchart.Output(reader.chars, reader.index, devnull).write(shifts)
+
+
+def bench_data_hiding(report: Report, corpus: str, stop_words: frozenset) -> None:
+    stage = partial(report.stage, 'data_hiding')
+    with stage('input'):
+        storage = data_hiding.LineStorage()
+        data_hiding.Input(storage).read_lines(io.StringIO(corpus))
+    with stage('shift'):
+        shifter = data_hiding.CircularShifter(storage)
+        shifter.setup()
+    with stage('filter'):
+        data_hiding.StopWordFilter(stop_words).filter(shifter)
+    with stage('sort'):
+        data_hiding.Alphabetizer().sort(shifter)
+    with open(os.devnull, 'w') as devnull, stage('output'):
+        data_hiding.Output(devnull).write(shifter)
+
+
+def run_isolated(bench: Callable[..., None], allocations: bool, *args) -> List[Row]:
+    """ The rows of the stages of bench, run in a new process. """
+    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return pool.submit(_run, bench, allocations, *args).result()
+
+
+def _run(bench: Callable[..., None], allocations: bool, *args) -> List[Row]:
+    report = Report(allocations)
+    bench(report, *args)
+    return report.rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--lines', type=int, nargs='+', default=[10_000])
+    parser.add_argument('--words', type=int, nargs=2, default=[3, 8],
+                        metavar=('MIN', 'MAX'))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--decomposition', choices=['flowchart', 'data_hiding'])
+    parser.add_argument('--compact', action='store_true',
+                        help='use the array-backed storage of flowchart')
+    parser.add_argument('--stop-words', action='store_true',
+                        help='filter out the default stop words')
+    parser.add_argument('--scan', action='store_true',
+                        help='also time the original quadratic shift scan')
+    parser.add_argument('--allocations', action='store_true',
+                        help='trace allocations, slowing every stage down')
+    args = parser.parse_args()
+
+    stop_words = flowchart.STOP_WORDS if args.stop_words else frozenset()
+    for lines in args.lines:
+        corpus = make_corpus(lines, *args.words, seed=args.seed)
+        report = Report(args.allocations)
+        if args.decomposition in (None, 'flowchart'):
+            report.rows += run_isolated(bench_flowchart, args.allocations, corpus,
+                                        args.compact, stop_words, args.scan)
+        if args.decomposition in (None, 'data_hiding'):
+            report.rows += run_isolated(bench_data_hiding, args.allocations,
+                                        corpus, stop_words)
+        report.print(f'{lines} lines, {args.words[0]}-{args.words[1]} words per line')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+""" Collation keys shared by the alphabetizing modules of both
+decompositions. A key is computed once per distinct word
+(or character) and cached, so sorting many shifts reuses
+a comparatively small set of precomputed keys. """
+import locale
+import unicodedata
+from typing import Dict
+
+
+class Collator:
+    """ Keys are case-folded and stripped of accents; with use_locale
+    they are further transformed by locale.strxfrm for the current
+    LC_COLLATE. Folded keys keep prefixes, so they can serve prefix
+    lookups; locale keys cannot. """
+
+    def __init__(self, use_locale: bool = False) -> None:
+        self.use_locale = use_locale
+        self._keys: Dict[str, str] = {}
+
+    @staticmethod
+    def fold(text: str) -> str:
+        decomposed = unicodedata.normalize('NFKD', text.casefold())
+        return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+    def key(self, word: str) -> str:
+        try:
+            return self._keys[word]
+        except KeyError:
+            key = self.fold(word)
+            if self.use_locale:
+                key = locale.strxfrm(key)
+            self._keys[word] = key
+            return key
+
+    def check_prefixes(self) -> None:
+        if self.use_locale:
+            raise ValueError('prefix lookup needs a collator without locale keys')
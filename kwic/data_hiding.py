@@ -1,11 +1,52 @@
 """ This decomposition created on the basis of information hiding. """
 
+import gc
+import random
 import sys
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from concurrent.futures import ProcessPoolExecutor
 from io import StringIO
-from typing import TextIO, List, Iterator, Callable
+from itertools import chain, islice, repeat
+from typing import TextIO, Dict, List, Iterator, Callable, Iterable, Optional, Tuple
 
+from collation import Collator
 
-class Line:
+STOP_WORDS = frozenset({
+    'a', 'an', 'and', 'as', 'at', 'by', 'for', 'from', 'in',
+    'into', 'of', 'on', 'or', 'the', 'to', 'with',
+})
+SAMPLE_SIZE = 256  # words sampled per worker to pick the key ranges
+
+
+Key = Tuple[str, ...]
+
+
+class BaseLine:
+    """ The words of a line or of one of its circular shifts.
+    Subclasses keep the words and give access to them. """
+    __slots__ = ()
+
+    def __iter__(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def __getitem__(self, item: int) -> str:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def __str__(self) -> str:
+        return ' '.join(self)
+
+    @property
+    def first_char(self) -> str:
+        word = self[0] if len(self) else ''
+        return word[0] if word else ''
+
+
+class Line(BaseLine):
+    __slots__ = ('_words',)
 
     def __init__(self, line: str) -> None:
         self._words = line.split(' ')
@@ -19,17 +60,44 @@ class Line:
     def __len__(self) -> int:
         return len(self._words)
 
-    @property
-    def first_char(self) -> str:
-        if self._words and self._words[0]:
-            return self._words[0][0]
-        return ''
+    def __str__(self) -> str:
+        return ' '.join(self._words)
+
+
+class ShiftedLine(BaseLine):
+    """ Circular shift of a line, kept as a view over the original
+    line and the number of its first word instead of a new string. """
+    __slots__ = ('_line', '_offset')
+
+    def __init__(self, line: Line, offset: int) -> None:
+        self._line = line
+        self._offset = offset
+
+    def __iter__(self) -> Iterator[str]:
+        return islice(chain(self._line, self._line), self._offset,
+                      self._offset + len(self._line))
+
+    def __getitem__(self, item: int) -> str:
+        return self._line[(self._offset + item) % len(self._line)]
+
+    def __len__(self) -> int:
+        return len(self._line)
 
 
 class LineStorage:
+    """ Once sorted, the storage remembers its order and keeps
+    lines added or removed later in place by binary search.
+    Likewise, once filtered it keeps rejecting the lines
+    the filter does not accept. Lines removed from an unsorted
+    storage are found by their text: the first removal numbers
+    the lines in storage order and indexes the numbers by text. """
 
     def __init__(self) -> None:
-        self._lines: List[Line] = []
+        self._lines: List[BaseLine] = []
+        self._order: Optional[Callable[[BaseLine], Key]] = None
+        self._accept: Optional[Callable[[BaseLine], bool]] = None
+        self._numbers_of: Optional[Dict[str, List[int]]] = None
+        self._numbers = array('q')  # ascending number of every line, once indexed
 
     def add_lines(self, lines: List[str]) -> None:
         for line in lines:
@@ -37,14 +105,94 @@ class LineStorage:
 
     def add_line(self, line: str) -> None:
         if line.strip():
-            self._lines.append(Line(line))
-
-    def sort(self, order: Callable[[Line], str]) -> None:
+            self.add(Line(line))
+
+    def add(self, line: BaseLine) -> None:
+        if self._accept is not None and not self._accept(line):
+            return
+        if self._order is None:
+            self._lines.append(line)
+            if self._numbers_of is not None:
+                number = self._numbers[-1] + 1 if self._numbers else 0
+                self._numbers.append(number)
+                self._numbers_of.setdefault(str(line), []).append(number)
+        else:
+            insort(self._lines, line, key=self._order)
+
+    def remove_line(self, line: str) -> None:
+        if self._accept is not None and not self._accept(Line(line)):
+            return
+        if self._order is None:
+            self._remove_unsorted(line)
+            return
+        key = self._order(Line(line))
+        positions = range(bisect_left(self._lines, key, key=self._order),
+                          bisect_right(self._lines, key, key=self._order))
+        for position in positions:
+            if str(self._lines[position]) == line:
+                del self._lines[position]
+                return
+        raise ValueError(f'{line!r} is not in storage')
+
+    def _remove_unsorted(self, line: str) -> None:
+        if self._numbers_of is None:
+            self._numbers_of = {}
+            self._numbers = array('q', range(len(self._lines)))
+            for number, stored in enumerate(self._lines):
+                self._numbers_of.setdefault(str(stored), []).append(number)
+        numbers = self._numbers_of.get(line)
+        if not numbers:
+            raise ValueError(f'{line!r} is not in storage')
+        number = numbers.pop(0)
+        if not numbers:
+            del self._numbers_of[line]
+        position = bisect_left(self._numbers, number)
+        del self._lines[position]
+        del self._numbers[position]
+
+    def _drop_index(self) -> None:
+        self._numbers_of = None
+        self._numbers = array('q')
+
+    def sort(self, order: Callable[[BaseLine], Key]) -> None:
         self._lines = list(sorted(self._lines, key=order))
-
-    def __iter__(self) -> Iterator[Line]:
+        self._order = order
+        self._drop_index()
+
+    def retain(self, accept: Callable[[BaseLine], bool]) -> None:
+        self._lines = [line for line in self._lines if accept(line)]
+        self._accept = accept
+        self._drop_index()
+
+    def concatenate(self, runs: Iterable[Iterable[BaseLine]],
+                    order: Callable[[BaseLine], Key],
+                    accept: Optional[Callable[[BaseLine], bool]] = None) -> None:
+        """ Replaces the lines with the runs, one after the other. Each run
+        must be sorted by order and come entirely before the next one,
+        and all must already be filtered by accept when one is given.
+        The lines of the runs cannot form reference cycles, so garbage
+        collection, which would rescan the storage again and again
+        while it grows, is paused until they are all stored. """
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            self._lines = list(chain.from_iterable(runs))
+        finally:
+            if collecting:
+                gc.enable()
+        self._order = order
+        self._accept = accept
+        self._drop_index()
+
+    def __iter__(self) -> Iterator[BaseLine]:
         return iter(self._lines)
 
+    def __getitem__(self, item: int) -> BaseLine:
+        return self._lines[item]
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
 
 class Input:
     """ This module reads the original lines from the input media
@@ -66,21 +214,150 @@ class CircularShifter:
 
     def setup(self) -> None:
         for line in self._lines:
-            for word_no, word in enumerate(line):
-                shifted = []
-                for i in range(word_no, word_no + len(line)):
-                    shifted.append(line[i % len(line)])
-                self.shifted.add_line(' '.join(shifted))
+            for shifted in self.shifts(line):
+                self.shifted.add(shifted)
+
+    def add_line(self, line: str) -> None:
+        if line.strip():
+            original = Line(line)
+            self._lines.add(original)
+            for shifted in self.shifts(original):
+                self.shifted.add(shifted)
+
+    def remove_line(self, line: str) -> None:
+        self._lines.remove_line(line)
+        for shifted in self.shifts(Line(line)):
+            self.shifted.remove_line(str(shifted))
+
+    @staticmethod
+    def shifts(line: Line) -> Iterator[ShiftedLine]:
+        return (ShiftedLine(line, word_no) for word_no in range(len(line)))
+
+
+class ParallelCircularShifter(CircularShifter):
+    """ Sorts the circular shifts with a sample sort over the worker
+    processes. The collation keys of a sample of words split the keys
+    into as many ranges as there are workers, and every worker gets
+    the lines with words in its range. It generates, filters and sorts
+    the shifts starting with those words and sends back only their
+    line and word numbers. The ranges follow each other in the order
+    of the keys, so the sorted shifts of the ranges are just
+    concatenated, as views over the stored lines. All the shifts
+    starting with one word fall in the same range, so a word starting
+    a large share of them limits how evenly the work is spread. """
+
+    def __init__(self, lines: LineStorage, workers: int,
+                 stop_words: Iterable[str] = (), sample_size: int = SAMPLE_SIZE) -> None:
+        super().__init__(lines)
+        self.workers = workers
+        self.stop_words = frozenset(stop_words)
+        self.sample_size = sample_size
+
+    def splitters(self, collator: Collator) -> List[str]:
+        """ The keys starting every range but the first, from the keys
+        of words drawn at random from the lines. """
+        lines = list(self._lines)
+        if not lines:
+            return []
+        rnd = random.Random(0)
+        stop_filter = StopWordFilter(self.stop_words)
+        shifts = (ShiftedLine(line, rnd.randrange(len(line)))
+                  for line in rnd.choices(lines, k=self.sample_size * self.workers))
+        keys = sorted(collator.key(shifted[0]) for shifted in shifts
+                      if stop_filter.accept(shifted))
+        if not keys:
+            return []
+        return sorted({keys[len(keys) * part // self.workers]
+                       for part in range(1, self.workers)})
+
+    def setup(self) -> None:
+        collator = Collator()
+        splitters = self.splitters(collator)
+        lines = list(self._lines)
+        texts = list(map(str, lines))
+        part_of = {word: bisect_right(splitters, collator.key(word))
+                   for word in set(chain.from_iterable(lines))}
+        parts: List[Tuple[List[int], List[str]]] = [([], []) for _ in range(len(splitters) + 1)]
+        for line_no, line in enumerate(lines):
+            for part in set(map(part_of.__getitem__, line)):
+                parts[part][0].append(line_no)
+                parts[part][1].append(texts[line_no])
+        with ProcessPoolExecutor(self.workers) as pool:
+            results = pool.map(shift_range, parts, repeat(splitters),
+                               range(len(parts)), repeat(self.stop_words))
+            runs = (map(ShiftedLine, map(lines.__getitem__, line_nos), word_nos)
+                    for line_nos, word_nos in results)
+            stop_filter = StopWordFilter(self.stop_words)
+            self.shifted.concatenate(runs, Alphabetizer(collator).order,
+                                     stop_filter.accept if stop_filter.stop_words else None)
+
+
+def shift_range(lines: Tuple[List[int], List[str]], splitters: List[str],
+                part: int, stop_words: Iterable[str] = ()) -> Tuple[array, array]:
+    """ The line and word numbers, in order, of the shifts of the numbered
+    lines that the filter accepts and that start with a word whose key
+    is in the part-th range between splitters. Shifts with equal keys
+    keep the order of their line and word numbers. """
+    alphabetizer = Alphabetizer()
+    stop_filter = StopWordFilter(stop_words)
+    in_range: Dict[str, bool] = {}
+    line_nos, word_nos = array('L'), array('L')
+    keys: List[Key] = []
+    for line_no, text in zip(*lines):
+        line = Line(text)
+        for word_no, word in enumerate(line):
+            if word not in in_range:
+                in_range[word] = (bisect_right(splitters, alphabetizer.collator.key(word)) == part
+                                  and stop_filter.accept(ShiftedLine(line, word_no)))
+            if in_range[word]:
+                keys.append(alphabetizer.order(ShiftedLine(line, word_no)))
+                line_nos.append(line_no)
+                word_nos.append(word_no)
+    order = sorted(range(len(keys)), key=keys.__getitem__)
+    return (array('L', map(line_nos.__getitem__, order)),
+            array('L', map(word_nos.__getitem__, order)))
+
+
+class StopWordFilter:
+    """ This module sits between the circular shifter
+    and the alphabetizer and drops the shifts whose leading word
+    is in the stop list, so they are neither stored nor sorted. """
+
+    def __init__(self, stop_words: Iterable[str] = STOP_WORDS) -> None:
+        self.stop_words = frozenset(word.casefold() for word in stop_words)
+
+    def accept(self, line: BaseLine) -> bool:
+        return line[0].casefold() not in self.stop_words
+
+    def filter(self, shifter: CircularShifter) -> None:
+        if self.stop_words:
+            shifter.shifted.retain(self.accept)
 
 
 class Alphabetizer:
+    """ Orders the shifts word by word by the collation keys
+    of their words, each computed once per distinct word. """
+
+    def __init__(self, collator: Optional[Collator] = None) -> None:
+        self.collator = collator or Collator()
 
-    def order(self, line: Line) -> str:
-        return line.first_char.lower()
+    def order(self, line: BaseLine) -> Key:
+        return tuple(map(self.collator.key, line))
 
     def sort(self, shifter: CircularShifter) -> None:
         shifter.shifted.sort(self.order)
 
+    def lookup(self, shifter: CircularShifter, prefix: str) -> range:
+        """ Positions of the sorted shifts starting with prefix. """
+        self.collator.check_prefixes()
+        prefix = ' '.join(map(self.collator.key, prefix.split(' ')))
+
+        def key(line: BaseLine) -> str:
+            return ' '.join(self.order(line))[:len(prefix)]
+
+        return range(bisect_left(shifter.shifted, prefix, key=key),
+                     bisect_right(shifter.shifted, prefix, key=key))
+
 
 class Output:
     """ This module will give the desired printing of set of lines
@@ -99,12 +376,18 @@ class Output:
 class MasterControl:
 
     @staticmethod
-    def execute(source: TextIO) -> None:
+    def execute(source: TextIO, workers: int = 1,
+                stop_words: Iterable[str] = ()) -> None:
         storage = LineStorage()
         Input(storage).read_lines(source)
-        shifter = CircularShifter(storage)
-        shifter.setup()
-        Alphabetizer().sort(shifter)
+        if workers > 1:
+            shifter = ParallelCircularShifter(storage, workers, stop_words)
+            shifter.setup()
+        else:
+            shifter = CircularShifter(storage)
+            shifter.setup()
+            StopWordFilter(stop_words).filter(shifter)
+            Alphabetizer().sort(shifter)
         Output().write(shifter)
 
 
@@ -1,26 +1,112 @@
 """ Implementation of modularization by shared data (very coupled).
 Based on "On the criteria to be used in decomposing systems into modules"
 by D. Parnas. """
+import heapq
+import os
 import sys
+import tempfile
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
+from contextlib import ExitStack
+from functools import partial
 from io import StringIO
-from typing import TextIO, List, Tuple
+from itertools import islice
+from typing import TextIO, List, Tuple, Iterable, Iterator, Union, Optional
+
+from collation import Collator
+
+CHUNK_SIZE = 1 << 16
+RUN_SIZE = 100_000
+MERGE_FAN_IN = 64
+BATCH_SIZE = 1024
+STOP_WORDS = frozenset({
+    'a', 'an', 'and', 'as', 'at', 'by', 'for', 'from', 'in',
+    'into', 'of', 'on', 'or', 'the', 'to', 'with',
+})
+
+
+class ShiftTable(Sequence):
+    """ Compact storage for the circular shifts: two parallel arrays
+    of machine integers instead of a list of tuples. It behaves like
+    the list of pairs (original line number, starting address). """
+
+    def __init__(self, shifts: Iterable[Tuple[int, int]] = ()) -> None:
+        self.lines = array('q')
+        self.addresses = array('q')
+        for shift in shifts:
+            self.append(shift)
+
+    def append(self, shift: Tuple[int, int]) -> None:
+        lineno, address = shift
+        self.lines.append(lineno)
+        self.addresses.append(address)
+
+    def __getitem__(self, item: int) -> Tuple[int, int]:
+        return self.lines[item], self.addresses[item]
+
+    def __len__(self) -> int:
+        return len(self.addresses)
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        return zip(self.lines, self.addresses)
+
+
+Chars = Union[List[str], str]
+Index = Union[List[int], array]
+Shifts = Union[List[Tuple[int, int]], ShiftTable]
+
+
+def line_end(chars: Chars, index: Index, lineno: int) -> int:
+    """ Address just past the last character of the line,
+    i.e. of its trailing newline or of the end of the text. """
+    if lineno + 1 < len(index):
+        return index[lineno + 1] - 1
+    return len(chars)
+
+
+def word_breaks(chars: Chars, start: int, end: int) -> Iterator[int]:
+    """ Addresses of the blanks between start and end. """
+    if isinstance(chars, str):
+        address = chars.find(' ', start, end)
+        while address != -1:
+            yield address
+            address = chars.find(' ', address + 1, end)
+    else:
+        for address in range(start, end):
+            if chars[address] == ' ':
+                yield address
 
 
 class Input:
     """ Reads the data lines from the input medium and stores them.
-    An index is kept to show the starting address of each line. """
+    An index is kept to show the starting address of each line.
+    In compact mode the characters are kept as a single string
+    and the index as an array of machine integers. """
 
-    def __init__(self) -> None:
-        self.chars: List[str] = []
-        self.index: List[int] = []
+    def __init__(self, compact: bool = False) -> None:
+        self.compact = compact
+        self.chars: Chars = []
+        self.index: Index = []
 
     def read_lines(self, medium: TextIO) -> None:
+        if self.compact:
+            self._read_compact(medium)
+            return
         self.index = [0]
         for address, char in enumerate(medium.read().strip()):
             if char == '\n':
                 self.index.append(address + 1)
             self.chars.append(char)
 
+    def _read_compact(self, medium: TextIO) -> None:
+        self.chars = medium.read().strip()
+        self.index = array('q', [0])
+        address = self.chars.find('\n')
+        while address != -1:
+            self.index.append(address + 1)
+            address = self.chars.find('\n', address + 1)
+
 
 class CircularShift:
     """ This module is called after the input module has completed its work.
@@ -29,10 +115,22 @@ class CircularShift:
     in the array made up by module 1. It leaves its output in core
     with words in pairs (original line number, starting address). """
 
-    def __init__(self) -> None:
-        self.shifts: List[Tuple[int, int]] = []
+    def __init__(self, compact: bool = False) -> None:
+        self.shifts: Shifts = ShiftTable() if compact else []
 
-    def make_shifts(self, chars: List[str], index: List[int]) -> None:
+    def make_shifts(self, chars: Chars, index: Index) -> None:
+        for lineno, line_start in enumerate(index):
+            end = line_end(chars, index, lineno)
+            if line_start == end:
+                continue
+            self.shifts.append((lineno, line_start))
+            for address in word_breaks(chars, line_start + 1, end):
+                self.shifts.append((lineno, address + 1))
+
+    def make_shifts_by_scan(self, chars: Chars, index: Index) -> None:
+        """ The original scan over the rest of the text for every line,
+        quadratic in the number of lines. Kept as a reference
+        to benchmark make_shifts against. """
         for lineno, line_start in enumerate(index):
             for shift, char in enumerate(chars[line_start:]):
                 address = shift + line_start
@@ -44,24 +142,93 @@ class CircularShift:
                     self.shifts.append((lineno, address + 1))
 
 
+class KeywordFilter:
+    """ This module is called between module 2 and module 3.
+    It drops the circular shifts whose leading word is in the stop list,
+    so that they are neither sorted nor printed. Only as many characters
+    as the longest stop word are looked at for every shift. """
+
+    def __init__(self, stop_words: Iterable[str] = STOP_WORDS) -> None:
+        self.stop_words = frozenset(word.casefold() for word in stop_words)
+        self.longest = max(map(len, self.stop_words), default=0)
+
+    def is_keyword(self, word: str) -> bool:
+        return word.casefold() not in self.stop_words
+
+    def leading_word(self, chars: Chars, index: Index,
+                     shift: Tuple[int, int]) -> str:
+        lineno, shift_address = shift
+        end_address = min(line_end(chars, index, lineno),
+                           shift_address + self.longest + 1)
+        return ''.join(chars[shift_address:end_address]).split(' ', 1)[0]
+
+    def filter(self, chars: Chars, index: Index, shifts: Shifts) -> Shifts:
+        if not self.stop_words:
+            return shifts
+        kept = (shift for shift in shifts
+                if self.is_keyword(self.leading_word(chars, index, shift)))
+        if isinstance(shifts, ShiftTable):
+            return ShiftTable(kept)
+        return list(kept)
+
+    def filter_lines(self, shifts: Iterable[str]) -> Iterator[str]:
+        """ The same for shifts already written out as text. """
+        for shift in shifts:
+            if self.is_keyword(shift.split(' ', 1)[0]):
+                yield shift
+
+
 class Alphabetizing:
     """ This module takes as input the arrays produced by modules I and 2.
     It produces an array in the same format as that produced by module 2.
     In this case, however, the circular shifts are listed
-    in another order (alphabetically). """
+    in another order (alphabetically): by the collation keys
+    of their words, shifts with equal keys keeping their order.
+    The keys of every shift are computed once, from the cached keys
+    of its words, and compared as tuples, without a comparator.
 
-    def __init__(self, chars: List[str], index: List[int]) -> None:
+    >>> reader = Input(compact=True)
+    >>> reader.read_lines(StringIO('Straße b\\nstrasse a\\nthe Fix\\n'))
+    >>> shifter = CircularShift(compact=True)
+    >>> shifter.make_shifts(reader.chars, reader.index)
+    >>> out = StringIO()
+    >>> Output(reader.chars, reader.index, out).write(
+    ...     Alphabetizing(reader.chars, reader.index).sort(shifter.shifts))
+    >>> listing = out.getvalue().splitlines()
+    >>> listing
+    ['a strasse', 'b Straße', 'Fix the', 'strasse a', 'Straße b', 'the Fix']
+    >>> listing == sorted(listing, key=lambda line: [
+    ...     Collator.fold(word) for word in line.split(' ')])
+    True
+    """
+
+    def __init__(self, chars: Chars, index: Index,
+                 collator: Optional[Collator] = None) -> None:
         self.chars = chars
         self.index = index
+        self.collator = collator or Collator()
+        self._text = chars if isinstance(chars, str) else ''.join(chars)
 
-    def order(self, shift: Tuple[int, int]) -> str:
-        _, shift_address = shift
-        if shift_address >= len(self.chars):
-            return ''
-        return self.chars[shift_address].lower()
+    def order(self, shift: Tuple[int, int]) -> Tuple[str, ...]:
+        """ The collation keys of the words of the shift as Output
+        writes it, the same words ExternalAlphabetizing orders by. """
+        lineno, shift_address = shift
+        start_address = self.index[lineno]
+        end_address = line_end(self._text, self.index, lineno)
+        text = self._text[shift_address:end_address]
+        if shift_address != start_address:
+            text += ' ' + self._text[start_address:shift_address]
+        return tuple(map(self.collator.key, text.strip().split(' ')))
 
-    def sort(self, shifts: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
-        return list(sorted(shifts, key=self.order))
+    def sort(self, shifts: Shifts) -> Shifts:
+        if isinstance(shifts, ShiftTable):
+            keys = list(map(self.order, shifts))
+            order = sorted(range(len(shifts)), key=keys.__getitem__)
+            ordered = ShiftTable()
+            ordered.lines = array('q', map(shifts.lines.__getitem__, order))
+            ordered.addresses = array('q', map(shifts.addresses.__getitem__, order))
+            return ordered
+        return sorted(shifts, key=self.order)
 
 
 class Output:
@@ -73,21 +240,143 @@ class Output:
     and the start of the circular shift may actually
     not be the first word in the line, etc. """
 
-    def __init__(self, chars: List[str], index: List[int],
+    def __init__(self, chars: Chars, index: Index,
                  destination: TextIO = sys.stdout):
         self.destination = destination
         self.chars = chars
         self.index = index
 
-    def write(self, shifts: List[Tuple[int, int]]) -> None:
+    def write(self, shifts: Shifts) -> None:
+        text = self.chars if isinstance(self.chars, str) else ''.join(self.chars)
+        batch: List[str] = []
         for lineno, shift_address in shifts:
             start_address = self.index[lineno]
-            first_part = [' '] + self.chars[start_address:shift_address]
-            shifted = self.chars[shift_address:] + first_part
-            for address, char in enumerate(self.chars):
-                if address > shift_address and char == '\n':
-                    shifted = self.chars[shift_address:address] + first_part
-            print(''.join(shifted).strip(), file=self.destination)
+            end_address = line_end(self.chars, self.index, lineno)
+            batch.append((text[shift_address:end_address] + ' '
+                          + text[start_address:shift_address]).strip() + '\n')
+            if len(batch) == BATCH_SIZE:
+                self.destination.writelines(batch)
+                batch.clear()
+        self.destination.writelines(batch)
+
+
+class Lookup:
+    """ Answers keyword queries from the arrays produced by module 3
+    and module 1. The shifts whose text starts with a given prefix
+    are adjacent in the alphabetized order, so they are found
+    by binary search over the shifts. """
+
+    def __init__(self, chars: Chars, index: Index, shifts: Shifts,
+                 collator: Optional[Collator] = None) -> None:
+        self.chars = chars
+        self.index = index
+        self.shifts = shifts
+        self.collator = collator or Collator()
+        self.collator.check_prefixes()
+
+    def collate(self, text: str) -> str:
+        """ The text with every word replaced by its collation key,
+        which may be longer or shorter than the word. """
+        return ' '.join(map(self.collator.key, text.split(' ')))
+
+    def key(self, shift: Tuple[int, int], size: int) -> str:
+        """ The first size characters of the collated shift. """
+        lineno, shift_address = shift
+        start_address = self.index[lineno]
+        end_address = line_end(self.chars, self.index, lineno)
+        text = (''.join(self.chars[shift_address:end_address]) + ' '
+                + ''.join(self.chars[start_address:shift_address])).strip()
+        return self.collate(text)[:size]
+
+    def lookup(self, prefix: str) -> range:
+        """ Positions in the shifts of those starting with prefix. """
+        prefix = self.collate(prefix)
+        key = partial(self.key, size=len(prefix))
+        return range(bisect_left(self.shifts, prefix, key=key),
+                     bisect_right(self.shifts, prefix, key=key))
+
+
+class ChunkedInput:
+    """ Streaming variant of module 1. Reads the input medium
+    in chunks of fixed size and hands the lines out one by one,
+    so the whole text is never kept in core. """
+
+    def __init__(self, chunk_size: int = CHUNK_SIZE) -> None:
+        self.chunk_size = chunk_size
+
+    def read_lines(self, medium: TextIO) -> Iterator[str]:
+        tail = ''
+        for chunk in iter(lambda: medium.read(self.chunk_size), ''):
+            lines = (tail + chunk).split('\n')
+            tail = lines.pop()
+            yield from (line.strip() for line in lines if line.strip())
+        if tail.strip():
+            yield tail.strip()
+
+
+class StreamingShift:
+    """ Streaming variant of module 2. Emits the circular shifts
+    of every line as soon as the line is read. """
+
+    @staticmethod
+    def shifts(lines: Iterable[str]) -> Iterator[str]:
+        for line in lines:
+            yield line
+            for address, char in enumerate(line):
+                if char == ' ':
+                    yield (line[address + 1:] + ' ' + line[:address + 1]).strip()
+
+
+class ExternalAlphabetizing:
+    """ Streaming variant of module 3. Sorts the shifts in runs
+    of bounded size, spills every run to a temporary file
+    and merges the runs back with k-way merges. At most fan_in
+    runs are open at once: when there are more, groups of them
+    are merged into longer runs first, in as many passes as needed. """
+
+    def __init__(self, run_size: int = RUN_SIZE,
+                 collator: Optional[Collator] = None,
+                 fan_in: int = MERGE_FAN_IN) -> None:
+        if fan_in < 2:
+            raise ValueError('fan_in must be at least 2')
+        self.run_size = run_size
+        self.collator = collator or Collator()
+        self.fan_in = fan_in
+
+    def order(self, shift: str) -> Tuple[str, ...]:
+        """ The collation keys of the words of the shift,
+        the same key Alphabetizing sorts the shifts in core by. """
+        return tuple(map(self.collator.key, shift.split(' ')))
+
+    @staticmethod
+    def _spill(directory: str, shifts: Iterable[str]) -> str:
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=directory,
+                                         delete=False) as spill:
+            spill.writelines(f'{shift}\n' for shift in shifts)
+        return spill.name
+
+    def _merge(self, runs: List[str]) -> Iterator[str]:
+        with ExitStack() as stack:
+            spills = [stack.enter_context(open(run, encoding='utf-8')) for run in runs]
+            yield from heapq.merge(*((line[:-1] for line in spill) for spill in spills),
+                                   key=self.order)
+
+    def sort(self, shifts: Iterable[str]) -> Iterator[str]:
+        shifts = iter(shifts)
+        with tempfile.TemporaryDirectory() as directory:
+            runs = []
+            for run in iter(lambda: list(islice(shifts, self.run_size)), []):
+                run.sort(key=self.order)
+                runs.append(self._spill(directory, run))
+            while len(runs) > self.fan_in:
+                merged = []
+                for group in range(0, len(runs), self.fan_in):
+                    merged.append(self._spill(
+                        directory, self._merge(runs[group:group + self.fan_in])))
+                    for run in runs[group:group + self.fan_in]:
+                        os.remove(run)
+                runs = merged
+            yield from self._merge(runs)
 
 
 class MasterControl:
@@ -96,14 +385,23 @@ class MasterControl:
      space allocation, etc. """
 
     @staticmethod
-    def to_kwic(source: TextIO) -> None:
-        reader = Input()
+    def to_kwic(source: TextIO, streaming: bool = False,
+                compact: bool = False, stop_words: Iterable[str] = ()) -> None:
+        keywords = KeywordFilter(stop_words)
+        if streaming:
+            lines = ChunkedInput().read_lines(source)
+            shifts = keywords.filter_lines(StreamingShift.shifts(lines))
+            sys.stdout.writelines(
+                f'{shift}\n' for shift in ExternalAlphabetizing().sort(shifts))
+            return
+        reader = Input(compact)
         reader.read_lines(source)
-        shifter = CircularShift()
+        shifter = CircularShift(compact)
         shifter.make_shifts(reader.chars, reader.index)
+        shifts = keywords.filter(reader.chars, reader.index, shifter.shifts)
         sorter = Alphabetizing(reader.chars, reader.index)
         out = Output(reader.chars, reader.index)
-        out.write(sorter.sort(shifter.shifts))
+        out.write(sorter.sort(shifts))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,131 @@
+""" Persistent KWIC index. The text of the lines and the sorted
+circular shifts are stored as a UTF-8 blob followed by fixed-width
+offset tables, so an index built once can be memory-mapped
+and read without parsing or sorting anything again.
+
+Layout (native byte order):
+    header   magic, format version, text size, number of lines,
+             number of shifts, 32 bytes in all
+    text     the lines joined by newlines, padded to 8 bytes,
+             so that every table below is aligned to 8 bytes
+    index    byte address of every line start, plus one past the end
+    lines    original line number of every shift
+    shifts   byte address of every shift """
+import mmap
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Iterable, Iterator, Sequence, Tuple
+
+from collation import Collator
+
+MAGIC = b'KWIC'
+VERSION = 2
+HEADER = struct.Struct('=4sIQQQ')
+WORD = array('q').itemsize
+
+
+def _padded(size: int) -> int:
+    return -(-size // WORD) * WORD
+
+
+def dump(path: str, chars: Sequence[str], index: Sequence[int],
+         shifts: Iterable[Tuple[int, int]]) -> None:
+    """ Stores the arrays of the shared data decomposition,
+    with the shifts in the order given by Alphabetizing.sort. """
+    text = ''.join(chars)
+    ends = list(index[1:]) + [len(text) + 1]
+    lines = [text[start:end - 1].encode() for start, end in zip(index, ends)]
+    starts = array('q', [0])
+    for line in lines:
+        starts.append(starts[-1] + len(line) + 1)
+    linenos, addresses = array('q'), array('q')
+    for lineno, address in shifts:
+        start = index[lineno]
+        prefix = text[start:address]
+        linenos.append(lineno)
+        addresses.append(starts[lineno] + len(prefix.encode()))
+    blob = b'\n'.join(lines)
+    with open(path, 'wb') as fp:
+        fp.write(HEADER.pack(MAGIC, VERSION, len(blob), len(lines), len(addresses)))
+        fp.write(blob.ljust(_padded(len(blob)), b'\0'))
+        fp.write(bytes(starts))
+        fp.write(bytes(linenos))
+        fp.write(bytes(addresses))
+
+
+def dump_lines(path: str, lines: Iterable[str]) -> None:
+    """ Stores already shifted and sorted lines, as kept
+    by the information hiding decomposition after Alphabetizer.sort. """
+    lines = [str(line) for line in lines]
+    text = '\n'.join(lines)
+    index, start = [], 0
+    for line in lines:
+        index.append(start)
+        start += len(line) + 1
+    dump(path, text, index, ((lineno, start) for lineno, start in enumerate(index)))
+
+
+class MappedIndex:
+    """ Read-only view of an index stored by dump or dump_lines.
+    Behaves like the sorted sequence of shift texts. """
+
+    def __init__(self, path: str) -> None:
+        with open(path, 'rb') as fp:
+            self._map = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, text_size, lines, shifts = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            if magic == MAGIC:
+                raise ValueError(f'{path!r} is a KWIC index of another version')
+            raise ValueError(f'{path!r} is not a KWIC index')
+        self._view = memoryview(self._map)
+        offset = HEADER.size
+        self.text = self._view[offset:offset + text_size]
+        offset += _padded(text_size)
+        self.index = self._table(offset, lines + 1)
+        offset += (lines + 1) * WORD
+        self.lines = self._table(offset, shifts)
+        offset += shifts * WORD
+        self.shifts = self._table(offset, shifts)
+
+    def _table(self, offset: int, size: int) -> memoryview:
+        return self._view[offset:offset + size * WORD].cast('q')
+
+    def __len__(self) -> int:
+        return len(self.shifts)
+
+    def _rotation(self, position: int) -> str:
+        lineno, address = self.lines[position], self.shifts[position]
+        start, end = self.index[lineno], self.index[lineno + 1] - 1
+        shifted = bytes(self.text[address:end]) + b' ' + bytes(self.text[start:address])
+        return shifted.decode()
+
+    def __getitem__(self, position: int) -> str:
+        return self._rotation(position).strip()
+
+    def __iter__(self) -> Iterator[str]:
+        return (self[position] for position in range(len(self)))
+
+    def lookup(self, prefix: str) -> range:
+        """ Positions of the shifts starting with prefix,
+        for an index sorted with the default Collator. """
+        prefix = Collator.fold(prefix)
+
+        def key(position: int) -> str:
+            return Collator.fold(self[position])[:len(prefix)]
+
+        positions = range(len(self))
+        return range(bisect_left(positions, prefix, key=key),
+                     bisect_right(positions, prefix, key=key))
+
+    def close(self) -> None:
+        for view in (self.text, self.index, self.lines, self.shifts, self._view):
+            view.release()
+        self._map.close()
+
+    def __enter__(self) -> 'MappedIndex':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,153 @@
+""" Asynchronous front-end for the information hiding decomposition.
+Clients send newline-delimited lines over a TCP or Unix socket:
+every line is a title to be indexed, except lines starting with '?',
+which are prefix queries answered with the matching circular shifts
+followed by an empty line. A line that cannot be read, because it is
+longer than the stream limit or not UTF-8, is skipped and answered
+with an error line starting with '!'; the connection stays open.
+
+Incoming titles wait in a bounded queue and are indexed in batches.
+When the queue is full, connections stop being read until it drains,
+so an ingest spike is held back by the sockets instead of in memory.
+
+    python service.py --port 8007
+    python service.py --unix /tmp/kwic.sock """
+import argparse
+import asyncio
+import logging
+from typing import AsyncIterator, Iterable, List, Optional
+
+from data_hiding import (
+    Alphabetizer, CircularShifter, LineStorage, StopWordFilter, STOP_WORDS,
+)
+
+QUERY = '?'
+ERROR = '!'
+BATCH_SIZE = 512
+QUEUE_SIZE = 10_000
+
+logger = logging.getLogger(__name__)
+
+
+class KwicService:
+
+    def __init__(self, stop_words: Iterable[str] = (),
+                 batch_size: int = BATCH_SIZE, queue_size: int = QUEUE_SIZE) -> None:
+        self.shifter = CircularShifter(LineStorage())
+        self.alphabetizer = Alphabetizer()
+        StopWordFilter(stop_words).filter(self.shifter)
+        self.alphabetizer.sort(self.shifter)
+        self.batch_size = batch_size
+        self.pending: asyncio.Queue = asyncio.Queue(queue_size)
+
+    async def ingest(self) -> None:
+        while True:
+            batch: List[str] = [await self.pending.get()]
+            while len(batch) < self.batch_size and not self.pending.empty():
+                batch.append(self.pending.get_nowait())
+            for line in batch:
+                self.shifter.add_line(line)
+                self.pending.task_done()
+
+    def lookup(self, prefix: str) -> List[str]:
+        shifted = self.shifter.shifted
+        return [str(shifted[position])
+                for position in self.alphabetizer.lookup(self.shifter, prefix)]
+
+    @staticmethod
+    async def read_lines(reader: asyncio.StreamReader) -> AsyncIterator[Optional[bytes]]:
+        """ The lines of reader, with None in place of every line longer
+        than its limit, which is skipped up to the next newline. """
+        while True:
+            try:
+                yield await reader.readuntil(b'\n')
+            except asyncio.IncompleteReadError as error:
+                if error.partial:
+                    yield error.partial
+                return
+            except asyncio.LimitOverrunError as error:
+                consumed = error.consumed
+                while True:
+                    await reader.readexactly(consumed)
+                    try:
+                        await reader.readuntil(b'\n')
+                        break
+                    except asyncio.IncompleteReadError:
+                        return
+                    except asyncio.LimitOverrunError as more:
+                        consumed = more.consumed
+                yield None
+
+    @staticmethod
+    async def reply_error(writer: asyncio.StreamWriter, message: str) -> None:
+        writer.write(f'{ERROR} {message}\n'.encode())
+        await writer.drain()
+
+    async def handle(self, reader: asyncio.StreamReader,
+                     writer: asyncio.StreamWriter) -> None:
+        try:
+            async for data in self.read_lines(reader):
+                if data is None:
+                    await self.reply_error(writer, 'line too long')
+                    continue
+                try:
+                    line = data.decode().rstrip('\r\n')
+                except UnicodeDecodeError:
+                    await self.reply_error(writer, 'line is not UTF-8')
+                    continue
+                if line.startswith(QUERY):
+                    answer = self.lookup(line[len(QUERY):].strip())
+                    writer.writelines(f'{shift}\n'.encode() for shift in answer)
+                    writer.write(b'\n')
+                    await writer.drain()
+                elif line.strip():
+                    await self.pending.put(line)
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+    async def serve(self, host: Optional[str] = None, port: Optional[int] = None,
+                    path: Optional[str] = None) -> None:
+        """ Serves until cancelled, or until indexing fails: producers
+        would then wait forever for room in the queue, so the error
+        is logged and the server stopped. """
+        if path is not None:
+            server = await asyncio.start_unix_server(self.handle, path)
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+        ingest = asyncio.create_task(self.ingest())
+
+        def ingest_done(task: asyncio.Task) -> None:
+            if not task.cancelled():
+                logger.error('indexing failed, stopping the service',
+                             exc_info=task.exception())
+                server.close()
+
+        ingest.add_done_callback(ingest_done)
+        try:
+            async with server:
+                await server.serve_forever()
+        except asyncio.CancelledError:
+            if not ingest.done() or ingest.cancelled():
+                raise
+        finally:
+            ingest.cancel()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8007)
+    parser.add_argument('--unix', metavar='PATH', help='listen on a Unix socket')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--queue-size', type=int, default=QUEUE_SIZE)
+    parser.add_argument('--stop-words', action='store_true',
+                        help='do not index shifts led by the default stop words')
+    args = parser.parse_args()
+    service = KwicService(STOP_WORDS if args.stop_words else (),
+                          args.batch_size, args.queue_size)
+    asyncio.run(service.serve(args.host, args.port, args.unix))
+
+
+if __name__ == '__main__':
+    main()